@@ -93,7 +93,7 @@ class MyCodec(YamlCodec):
     @classmethod
     def is_yaml_tag_supported(cls, yaml_tag_suffix: str) -> bool:
         # return True if the given yaml tag suffix is supported
-        return yaml_tag_suffix in yaml_tags_to_types.keys()
+        return yaml_tag_suffix in yaml_tags_to_types
 
     # ----
 
@@ -3,9 +3,9 @@
 #
 #  License: 3-clause BSD, <https://github.com/smarie/python-yamlable/blob/master/LICENSE>
 
-from yamlable.base import AbstractYamlObject, NONE_IGNORE_CHECKS, read_yaml_node_as_dict
+from yamlable.base import AbstractYamlObject, NONE_IGNORE_CHECKS, read_yaml_node_as_dict, Y
 from yamlable.main import YamlCodec, register_yamlable_codec, yaml_info_decorate, yaml_info, YamlAble, \
-    AbstractYamlAble, YAMLABLE_PREFIX
+    AbstractYamlAble, YAMLABLE_PREFIX, YA
 from yamlable.yaml_objects import YamlObject2, ABCYAMLMeta, YAMLObjectMetaclassStrict
 
 try:
@@ -27,17 +27,7 @@ __all__ = [
     'AbstractYamlObject', 'NONE_IGNORE_CHECKS', 'read_yaml_node_as_dict',
     'YamlCodec', 'register_yamlable_codec', 'yaml_info_decorate', 'yaml_info', 'YamlAble', 'AbstractYamlAble',
     'YAMLABLE_PREFIX',
-    'YamlObject2', 'ABCYAMLMeta', 'YAMLObjectMetaclassStrict'
+    'YamlObject2', 'ABCYAMLMeta', 'YAMLObjectMetaclassStrict',
+    # type variables
+    'Y', 'YA'
 ]
-
-try:  # python 3.5+
-    from yamlable.base import Y  # noqa: F401
-    __all__.append('Y')
-except ImportError:
-    pass
-
-try:  # python 3.5+
-    from yamlable.main import YA  # noqa: F401
-    __all__.append('YA')
-except ImportError:
-    pass
@@ -4,45 +4,70 @@
 #  License: 3-clause BSD, <https://github.com/smarie/python-yamlable/blob/master/LICENSE>
 
 from abc import ABCMeta
-from collections import OrderedDict
 
-from yaml import ScalarNode, SequenceNode, MappingNode
+from yaml import ScalarNode, SequenceNode, MappingNode, Loader, SafeLoader, Dumper, SafeDumper, \
+    load as _yaml_load, load_all as _yaml_load_all, dump as _yaml_dump, dump_all as _yaml_dump_all
 
 try:
-    # Python 2 only:
-    from StringIO import StringIO as _StringIO  # type: ignore  # noqa
-
-    # create a variant that can serve as a context manager
-    class StringIO(_StringIO):
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exception_type, exception_value, traceback):
-            self.close()
+    # use the libyaml-based loader and dumper when available, they are much faster
+    from yaml import CSafeLoader as _SafeLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, SafeDumper as _SafeDumper  # type: ignore
 
+try:  # PyYaml 5.1+
+    # the loader used by `yaml.load` by default in PyYaml 5.1+ (now mandatory to pass explicitly in PyYaml 6+)
+    from yaml import FullLoader as _FullLoader
 except ImportError:
-    # (IOBase is only used in type hints)
-    from io import IOBase, StringIO  # type: ignore
+    from yaml import Loader as _FullLoader  # type: ignore
 
+# (IOBase and StringIO are only used in type hints)
+from io import IOBase, StringIO  # noqa: F401
+from keyword import iskeyword
 from warnings import warn
 
-import six
+from typing import Union, TypeVar, Dict, Any, Sequence, Iterable, Iterator, List, Tuple, Callable, Type
 
-try:  # python 3.5+
-    from typing import Union, TypeVar, Dict, Any, Sequence
+Y = TypeVar('Y', bound='AbstractYamlObject')
 
-    Y = TypeVar('Y', bound='AbstractYamlObject')
 
+_LIBYAML_VARIANTS = dict()  # type: Dict[type, type]
+"""The libyaml-based equivalent of each pure-python pyyaml loader and dumper, when libyaml is available"""
+try:
+    from yaml import CLoader, CSafeLoader, CDumper, CSafeDumper
 except ImportError:
-    pass
+    pass  # pyyaml was not compiled with libyaml
+else:
+    _LIBYAML_VARIANTS.update({Loader: CLoader, SafeLoader: CSafeLoader, Dumper: CDumper, SafeDumper: CSafeDumper})
+    try:  # PyYaml 5.1+
+        from yaml import FullLoader, CFullLoader
+        _LIBYAML_VARIANTS[FullLoader] = CFullLoader
+    except ImportError:
+        pass
+
+
+def _has_legacy_method(cls,        # type: Type[Any]
+                       method_name  # type: str
+                       ):
+    # type: (...) -> bool
+    """
+    Returns True if `cls` has a method named `method_name` (legacy, non-dunder method names). The result is cached on
+    the class itself so that the lookup is only done once per class and not at each dump/load.
 
-try:  # python 3.5.4+
-    from typing import Type
-except ImportError:
-    pass  # normal for old versions of typing
+    :param cls:
+    :param method_name:
+    :return:
+    """
+    cache_name = '_yamlable_has_' + method_name
+    try:
+        # note: look in the class __dict__ only, so that each subclass has its own cached flag
+        return cls.__dict__[cache_name]
+    except KeyError:
+        res = hasattr(cls, method_name)
+        setattr(cls, cache_name, res)
+        return res
 
 
-class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
+class AbstractYamlObject(metaclass=ABCMeta):
     """
     Adds convenient methods load(s)_yaml/dump(s)_yaml to any object, to call pyyaml features directly on the object or
     on the object class.
@@ -50,6 +75,15 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
     Also adds the two methods __to_yaml_dict__ / __from_yaml_dict__, that are common to YamlObject2 and YamlAble.
     Default implementation uses vars(self) and cls(**dct), but subclasses can override.
     """
+    # no instance attribute here, so that subclasses declaring `__slots__` have no `__dict__`
+    __slots__ = ()
+
+    # pyyaml loader/dumper classes used by the load(s)_yaml/dump(s)_yaml methods, resolved once at import time (the
+    # libyaml-based ones when available) instead of on every call.
+    _YAML_LOADER_SAFE = _SafeLoader
+    _YAML_LOADER_UNSAFE = _FullLoader
+    _YAML_DUMPER_SAFE = _SafeDumper
+    _YAML_DUMPER_UNSAFE = Dumper
 
     # def __to_yaml_scalar__(self):
     #     # type: (...) -> Any
@@ -81,17 +115,17 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
         Implementors should transform the object into a dictionary containing all information necessary to decode the
         object in the future. That dictionary will be serialized as a YAML mapping.
 
-        Default implementation returns vars(self).
+        Default implementation returns vars(self), completed with the attributes stored in `__slots__` if any.
         :return:
         """
         # Legacy compliance with old 'not dunder' method name TODO remove in future version
-        if 'to_yaml_dict' in dir(self):
+        if _has_legacy_method(type(self), 'to_yaml_dict'):
             warn(type(self).__name__ + " still uses the legacy method name 'to_yaml_dict'. This name will not be "
                                        "supported in future version, please use '__to_yaml_dict__' instead")
             return self.to_yaml_dict()  # type: ignore
 
-        # Default: return vars(self) (Note: no need to make a copy, pyyaml does not modify it)
-        return vars(self)
+        # Default: return vars(self), and the attributes in __slots__ if any
+        return _vars_and_slots(self)
 
     @classmethod
     def __from_yaml_scalar__(cls,      # type: Type[Y]
@@ -160,7 +194,7 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
         :return:
         """
         # Legacy compliance with old 'not dunder' method name TODO remove in future version
-        if 'from_yaml_dict' in dir(cls):
+        if _has_legacy_method(cls, 'from_yaml_dict'):
             warn(cls.__name__ + " still uses the legacy method name 'from_yaml_dict'. This name will not be "
                                 "supported in future version, please use '__from_yaml_dict__' instead")
             return cls.from_yaml_dict(dct, yaml_tag)  # type: ignore
@@ -175,26 +209,60 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
                   ):
         # type: (...) -> None
         """
-        Dumps this object to a yaml file or stream using pyYaml.
-
-        :param file_path_or_stream: either a string representing the file path, or a stream where to write
-        :param safe: True (default) uses `yaml.safe_dump`. False uses `yaml.dump`
+        Dumps this object to a yaml file or stream using pyYaml. This dispatches to `dump_yaml_to_path` or
+        `dump_yaml_to_stream`, that you can call directly if you know which kind of target you have.
+
+        :param file_path_or_stream: either a string representing the file path, or a stream where to write. Files are
+            written in binary mode, using the `encoding` provided in `pyyaml_kwargs` (default 'utf-8'). Streams are
+            written incrementally by pyyaml and are not closed.
+        :param safe: True (default) uses `yaml.safe_dump` (with the libyaml-based `CSafeDumper` if available). False
+            uses `yaml.dump`
         :param pyyaml_kwargs: keyword arguments for the pyYaml dump method
         :return:
         """
-        from yaml import safe_dump, dump
         if isinstance(file_path_or_stream, str):
-            with open(file_path_or_stream, mode='w+t') as f:
-                if safe:
-                    safe_dump(self, f, **pyyaml_kwargs)
-                else:
-                    dump(self, f, **pyyaml_kwargs)
+            self.dump_yaml_to_path(file_path_or_stream, safe=safe, **pyyaml_kwargs)
         else:
-            with file_path_or_stream as f:  # type: ignore
-                if safe:
-                    safe_dump(self, f, **pyyaml_kwargs)
-                else:
-                    dump(self, f, **pyyaml_kwargs)
+            self.dump_yaml_to_stream(file_path_or_stream, safe=safe, **pyyaml_kwargs)
+
+    def dump_yaml_to_path(self,
+                          file_path,       # type: str
+                          safe=True,       # type: bool
+                          **pyyaml_kwargs  # type: Any
+                          ):
+        # type: (...) -> None
+        """
+        Dumps this object to a yaml file using pyYaml. The file is written in binary mode, using the `encoding`
+        provided in `pyyaml_kwargs` (default 'utf-8').
+
+        :param file_path: the path of the file to write
+        :param safe: True (default) uses `yaml.safe_dump` (with the libyaml-based `CSafeDumper` if available). False
+            uses `yaml.dump`
+        :param pyyaml_kwargs: keyword arguments for the pyYaml dump method
+        :return:
+        """
+        # write bytes: the encoding is done by the pyyaml emitter (in C with libyaml) instead of a text wrapper
+        if pyyaml_kwargs.get('encoding', None) is None:
+            pyyaml_kwargs['encoding'] = 'utf-8'
+        with open(file_path, mode='wb') as f:
+            _yaml_dump(self, f, Dumper=self._YAML_DUMPER_SAFE if safe else self._YAML_DUMPER_UNSAFE, **pyyaml_kwargs)
+
+    def dump_yaml_to_stream(self,
+                            stream,          # type: Union[IOBase, StringIO]
+                            safe=True,       # type: bool
+                            **pyyaml_kwargs  # type: Any
+                            ):
+        # type: (...) -> None
+        """
+        Dumps this object to a yaml stream using pyYaml. The stream is written incrementally and is not closed.
+
+        :param stream: the stream where to write
+        :param safe: True (default) uses `yaml.safe_dump` (with the libyaml-based `CSafeDumper` if available). False
+            uses `yaml.dump`
+        :param pyyaml_kwargs: keyword arguments for the pyYaml dump method
+        :return:
+        """
+        _yaml_dump(self, stream, Dumper=self._YAML_DUMPER_SAFE if safe else self._YAML_DUMPER_UNSAFE, **pyyaml_kwargs)
 
     def dumps_yaml(self,
                    safe=True,       # type: bool
@@ -205,14 +273,60 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
         Dumps this object to a yaml string and returns it.
 
         :param pyyaml_kwargs: keyword arguments for the pyYaml dump method
-        :param safe: True (default) uses `yaml.safe_dump`. False uses `yaml.dump`
+        :param safe: True (default) uses `yaml.safe_dump` (with the libyaml-based `CSafeDumper` if available). False
+            uses `yaml.dump`
         :return:
         """
-        from yaml import safe_dump, dump
-        if safe:
-            return safe_dump(self, **pyyaml_kwargs)
+        return _yaml_dump(self, Dumper=self._YAML_DUMPER_SAFE if safe else self._YAML_DUMPER_UNSAFE, **pyyaml_kwargs)
+
+    @classmethod
+    def dump_all_yaml(cls,
+                      objs,                 # type: Iterable[AbstractYamlObject]
+                      file_path_or_stream,  # type: Union[str, IOBase, StringIO]
+                      safe=True,            # type: bool
+                      **pyyaml_kwargs       # type: Any
+                      ):
+        # type: (...) -> None
+        """
+        Dumps the provided objects to a multi-document yaml file or stream using pyYaml. All documents are written
+        with the same pyyaml dumper, like `yaml.dump_all`, instead of creating one dumper per object.
+
+        :param objs: the objects to dump, one document per object
+        :param file_path_or_stream: either a string representing the file path, or a stream where to write. Files are
+            written in binary mode, using the `encoding` provided in `pyyaml_kwargs` (default 'utf-8'). Streams are
+            written incrementally by pyyaml and are not closed.
+        :param safe: True (default) uses `yaml.safe_dump_all` (with the libyaml-based `CSafeDumper` if available).
+            False uses `yaml.dump_all`
+        :param pyyaml_kwargs: keyword arguments for the pyYaml dump_all method
+        :return:
+        """
+        dumper = cls._YAML_DUMPER_SAFE if safe else cls._YAML_DUMPER_UNSAFE
+        if isinstance(file_path_or_stream, str):
+            if pyyaml_kwargs.get('encoding', None) is None:
+                pyyaml_kwargs['encoding'] = 'utf-8'
+            with open(file_path_or_stream, mode='wb') as f:
+                _yaml_dump_all(objs, f, Dumper=dumper, **pyyaml_kwargs)
         else:
-            return dump(self, **pyyaml_kwargs)
+            _yaml_dump_all(objs, file_path_or_stream, Dumper=dumper, **pyyaml_kwargs)
+
+    @classmethod
+    def dumps_all_yaml(cls,
+                       objs,            # type: Iterable[AbstractYamlObject]
+                       safe=True,       # type: bool
+                       **pyyaml_kwargs  # type: Any
+                       ):
+        # type: (...) -> str
+        """
+        Dumps the provided objects to a multi-document yaml string and returns it. All documents are written with the
+        same pyyaml dumper, like `yaml.dump_all`, instead of creating one dumper per object.
+
+        :param objs: the objects to dump, one document per object
+        :param safe: True (default) uses `yaml.safe_dump_all` (with the libyaml-based `CSafeDumper` if available).
+            False uses `yaml.dump_all`
+        :param pyyaml_kwargs: keyword arguments for the pyYaml dump_all method
+        :return:
+        """
+        return _yaml_dump_all(objs, Dumper=cls._YAML_DUMPER_SAFE if safe else cls._YAML_DUMPER_UNSAFE, **pyyaml_kwargs)
 
     @classmethod
     def loads_yaml(cls,          # type: Type[Y]
@@ -225,10 +339,12 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
         successfully if the result is an instance of `cls`.
 
         :param yaml_str:
-        :param safe: True (default) uses `yaml.safe_load`. False uses `yaml.load`
+        :param safe: True (default) uses `yaml.safe_load` (with the libyaml-based `CSafeLoader` if available). False
+            uses `yaml.load` with the `FullLoader`
         :return:
         """
-        return cls.load_yaml(StringIO(yaml_str), safe=safe)
+        res = _yaml_load(yaml_str, Loader=cls._YAML_LOADER_SAFE if safe else cls._YAML_LOADER_UNSAFE)
+        return _check_instance(res, cls)
 
     @classmethod
     def load_yaml(cls,                  # type: Type[Y]
@@ -238,32 +354,239 @@ class AbstractYamlObject(six.with_metaclass(ABCMeta, object)):
         # type: (...) -> Y
         """
         Parses the given file path or stream as a yaml document. This methods only returns successfully if the result
-        is an instance of `cls`.
+        is an instance of `cls`. This dispatches to `load_yaml_from_path` or `load_yaml_from_stream`, that you can call
+        directly if you know which kind of source you have.
 
-        :param file_path_or_stream:
-        :param safe: True (default) uses `yaml.safe_load`. False uses `yaml.load`
+        :param file_path_or_stream: either a string representing the file path, or a stream to read. Streams are not
+            closed.
+        :param safe: True (default) uses `yaml.safe_load` (with the libyaml-based `CSafeLoader` if available). False
+            uses `yaml.load` with the `FullLoader`
         :return:
         """
-        from yaml import safe_load, load
         if isinstance(file_path_or_stream, str):
-            with open(file_path_or_stream, mode='rt') as f:
-                if safe:
-                    res = safe_load(f.read())
-                else:
-                    res = load(f.read())
+            return cls.load_yaml_from_path(file_path_or_stream, safe=safe)
         else:
-            with file_path_or_stream as f:  # type: ignore
-                if safe:
-                    res = safe_load(f.read())
-                else:
-                    res = load(f.read())
-
-        if isinstance(res, cls):
-            return res
+            return cls.load_yaml_from_stream(file_path_or_stream, safe=safe)
+
+    @classmethod
+    def load_yaml_from_path(cls,       # type: Type[Y]
+                            file_path,  # type: str
+                            safe=True   # type: bool
+                            ):
+        # type: (...) -> Y
+        """
+        Parses the given file as a yaml document. This methods only returns successfully if the result is an instance
+        of `cls`. The file is opened in binary mode and directly fed to pyyaml.
+
+        :param file_path: the path of the file to read
+        :param safe: True (default) uses `yaml.safe_load` (with the libyaml-based `CSafeLoader` if available). False
+            uses `yaml.load` with the `FullLoader`
+        :return:
+        """
+        # read bytes: the decoding is done by the pyyaml reader (in C with libyaml) instead of a text wrapper
+        with open(file_path, mode='rb') as f:
+            res = _yaml_load(f, Loader=cls._YAML_LOADER_SAFE if safe else cls._YAML_LOADER_UNSAFE)
+        return _check_instance(res, cls)
+
+    @classmethod
+    def load_yaml_from_stream(cls,      # type: Type[Y]
+                              stream,    # type: Union[IOBase, StringIO]
+                              safe=True  # type: bool
+                              ):
+        # type: (...) -> Y
+        """
+        Parses the given stream as a yaml document. This methods only returns successfully if the result is an
+        instance of `cls`. The stream is directly fed to pyyaml, and is not closed.
+
+        :param stream: the stream to read
+        :param safe: True (default) uses `yaml.safe_load` (with the libyaml-based `CSafeLoader` if available). False
+            uses `yaml.load` with the `FullLoader`
+        :return:
+        """
+        res = _yaml_load(stream, Loader=cls._YAML_LOADER_SAFE if safe else cls._YAML_LOADER_UNSAFE)
+        return _check_instance(res, cls)
+
+    @classmethod
+    def loads_all_yaml(cls,          # type: Type[Y]
+                       yaml_str,     # type: str
+                       safe=True     # type: bool
+                       ):
+        # type: (...) -> Iterator[Y]
+        """
+        Utility method to lazily load instances of this class from the provided multi-document yaml string. All
+        documents are parsed with the same pyyaml loader, one at a time: this is a generator, like `yaml.load_all`.
+        A `TypeError` is raised when a document that is not an instance of `cls` is reached.
+
+        :param yaml_str:
+        :param safe: True (default) uses `yaml.safe_load_all` (with the libyaml-based `CSafeLoader` if available).
+            False uses `yaml.load_all` with the `FullLoader`
+        :return:
+        """
+        for res in _yaml_load_all(yaml_str, Loader=cls._YAML_LOADER_SAFE if safe else cls._YAML_LOADER_UNSAFE):
+            yield _check_instance(res, cls)
+
+    @classmethod
+    def load_all_yaml(cls,                  # type: Type[Y]
+                      file_path_or_stream,  # type: Union[str, IOBase, StringIO]
+                      safe=True             # type: bool
+                      ):
+        # type: (...) -> Iterator[Y]
+        """
+        Lazily parses the given file path or stream as a multi-document yaml stream. All documents are parsed with the
+        same pyyaml loader, one at a time: this is a generator, like `yaml.load_all`. A `TypeError` is raised when a
+        document that is not an instance of `cls` is reached. Files are closed once the generator is exhausted or
+        closed, streams are not closed.
+
+        :param file_path_or_stream:
+        :param safe: True (default) uses `yaml.safe_load_all` (with the libyaml-based `CSafeLoader` if available).
+            False uses `yaml.load_all` with the `FullLoader`
+        :return:
+        """
+        loader = cls._YAML_LOADER_SAFE if safe else cls._YAML_LOADER_UNSAFE
+        if isinstance(file_path_or_stream, str):
+            with open(file_path_or_stream, mode='rb') as f:
+                for res in _yaml_load_all(f, Loader=loader):
+                    yield _check_instance(res, cls)
         else:
-            raise TypeError("Decoded object is not an instance of {}, but a {}. Please make sure that the YAML document"
-                            " starts with the tag defined in you class' `yaml_tag` field, for example `!my_type`"
-                            "".format(cls.__name__, type(res).__name__))
+            for res in _yaml_load_all(file_path_or_stream, Loader=loader):
+                yield _check_instance(res, cls)
+
+
+_DEFAULT_TO_YAML_DICT = AbstractYamlObject.__to_yaml_dict__
+""" The default `__to_yaml_dict__`, so that encoders can detect when it is not overridden and skip calling it """
+
+
+def _check_instance(res,  # type: Any
+                    cls   # type: Type[Y]
+                    ):
+    # type: (...) -> Y
+    """
+    Returns `res` if it is an instance of `cls`, and raises a `TypeError` otherwise. Used to validate loaded objects.
+
+    :param res:
+    :param cls:
+    :return:
+    """
+    if isinstance(res, cls):
+        return res
+    else:
+        raise TypeError("Decoded object is not an instance of {}, but a {}. Please make sure that the YAML document"
+                        " starts with the tag defined in you class' `yaml_tag` field, for example `!my_type`"
+                        "".format(cls.__name__, type(res).__name__))
+
+
+def _mangle(cls_name,  # type: str
+            name       # type: str
+            ):
+    # type: (...) -> str
+    """
+    Returns the name under which attribute `name` is stored on instances when it is used in the body of class
+    `cls_name`: python mangles private names (`__x` but not `__x__`) into `_<cls_name>__x`.
+
+    :param cls_name:
+    :param name:
+    :return:
+    """
+    if name.startswith('__') and not name.endswith('__'):
+        stripped = cls_name.lstrip('_')
+        if stripped:
+            # note: python does not mangle names in classes whose name only contains underscores
+            return '_' + stripped + name
+    return name
+
+
+def _make_to_yaml_dict(attr_names,  # type: Sequence[str]
+                       cls_name     # type: str
+                       ):
+    # type: (...) -> Callable
+    """
+    Generates a specialized `__to_yaml_dict__` method returning a new dictionary with the given attributes, for example
+    `return {'a': self.a, 'b': self.b}` for `attr_names=('a', 'b')`. Contrary to `vars(self)` this works with attributes
+    stored in `__slots__`, and there is no loop at runtime. Note that all attributes have to be set on the instance.
+
+    Private names (`__x`) are mangled as in the body of class `cls_name`, and dumped under their mangled name, like
+    `vars(self)` would.
+
+    :param attr_names: the attribute names, as written in the body of class `cls_name`
+    :param cls_name: the name of the class declaring `__yaml_slots__`, used to mangle the private names
+    :return:
+    """
+    for n in attr_names:
+        if not isinstance(n, str) or not n.isidentifier() or iskeyword(n):
+            raise ValueError("Invalid attribute name in `__yaml_slots__`: %r" % (n,))
+
+    # the generated function is not defined in the class body, so python does not mangle the private names: do it here
+    attr_names = [_mangle(cls_name, n) for n in attr_names]
+    src = "def __to_yaml_dict__(self):\n    return {%s}\n" % ", ".join("%r: self.%s" % (n, n) for n in attr_names)
+    namespace = dict()  # type: Dict[str, Any]
+    exec(src, namespace)
+    to_yaml_dict = namespace['__to_yaml_dict__']
+    to_yaml_dict.__yamlable_generated__ = True
+    return to_yaml_dict
+
+
+def _get_slots(cls  # type: Type[Any]
+               ):
+    # type: (...) -> Tuple[str, ...]
+    """
+    Returns the names of all attributes declared in the `__slots__` of `cls` and of its parents, as stored on the
+    instances: private names (`__x`) are mangled by python, so they are returned mangled (`_<class name>__x`), as in
+    `vars(obj)`. The result is cached on the class itself so that the mro is only explored once per class and not at
+    each dump.
+
+    :param cls:
+    :return:
+    """
+    try:
+        # note: look in the class __dict__ only, so that each subclass has its own cached slots
+        return cls.__dict__['_yamlable_slots']
+    except KeyError:
+        slots = []  # type: List[str]
+        for c in reversed(cls.__mro__):
+            c_slots = c.__dict__.get('__slots__', ())
+            for name in ((c_slots,) if isinstance(c_slots, str) else c_slots):
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                # note: two classes declaring the same private name have two distinct slots
+                attr_name = _mangle(c.__name__, name)
+                if attr_name not in slots:
+                    slots.append(attr_name)
+        res = tuple(slots)
+        setattr(cls, '_yamlable_slots', res)
+        return res
+
+
+def _vars_and_slots(obj  # type: Any
+                    ):
+    # type: (...) -> Dict[str, Any]
+    """
+    Returns `vars(obj)` if the class of `obj` does not declare `__slots__`. Otherwise returns a new dictionary
+    containing the attributes stored in `__slots__` (the ones that are set on `obj`) and the ones in `obj.__dict__`.
+    In both cases private attributes (`__x`) are keyed by their mangled name, so that a class dumps the same whether
+    it stores its attributes in slots or not.
+
+    :param obj:
+    :return:
+    """
+    slots = _get_slots(type(obj))
+    if not slots:
+        # Note: no need to make a copy, pyyaml does not modify it. Direct attribute access is equivalent to the `vars`
+        # builtin, without the extra call.
+        return obj.__dict__
+
+    res = dict()  # type: Dict[str, Any]
+    for attr_name in slots:
+        try:
+            res[attr_name] = getattr(obj, attr_name)
+        except AttributeError:
+            # this slot is not set
+            pass
+    try:
+        res.update(obj.__dict__)
+    except AttributeError:
+        # no __dict__: all attributes are stored in __slots__
+        pass
+    return res
 
 
 NONE_IGNORE_CHECKS = None
@@ -272,7 +595,7 @@ NONE_IGNORE_CHECKS = None
 
 
 def read_yaml_node_as_dict(loader, node):
-    # type: (...) -> OrderedDict
+    # type: (...) -> Dict[str, Any]
     """
     Utility method to read a yaml node into a dictionary
 
@@ -282,8 +605,8 @@ def read_yaml_node_as_dict(loader, node):
     """
     # loader.flatten_mapping(node)
     # pairs = loader.construct_pairs(node, deep=True)  # 'deep' allows the construction to be complete (inner seq...)
-    pairs = loader.construct_mapping(node, deep=True)  # 'deep' allows the construction to be complete (inner seq...)
-    constructor_args = OrderedDict(pairs)
+    # note: construct_mapping already returns a new dict (ordered on python 3.7+), no need to copy it
+    constructor_args = loader.construct_mapping(node, deep=True)  # 'deep' allows the construction to be complete
     return constructor_args
 
 
@@ -313,6 +636,14 @@ def read_yaml_node_as_scalar(loader, node):
     return value
 
 
+_NODE_READERS = {
+    ScalarNode: (read_yaml_node_as_scalar, '__from_yaml_scalar__'),
+    SequenceNode: (read_yaml_node_as_sequence, '__from_yaml_list__'),
+    MappingNode: (read_yaml_node_as_dict, '__from_yaml_dict__'),
+}
+"""The function to read each kind of yaml node, and the name of the AbstractYamlObject method to create the object"""
+
+
 def read_yaml_node_as_yamlobject(
     cls,      # type: Type[AbstractYamlObject]
     loader,
@@ -327,17 +658,95 @@ def read_yaml_node_as_yamlobject(
     :param node:
     :return:
     """
-    if isinstance(node, ScalarNode):
-        constructor_args = read_yaml_node_as_scalar(loader, node)
-        return cls.__from_yaml_scalar__(constructor_args, yaml_tag=yaml_tag)  # type: ignore
+    try:
+        read_node, from_yaml_method_name = _NODE_READERS[type(node)]
+    except KeyError:
+        raise TypeError("Unknown type of yaml node: %r. Please report this to `yamlable` project." % type(node))
 
-    elif isinstance(node, SequenceNode):
-        constructor_args = read_yaml_node_as_sequence(loader, node)
-        return cls.__from_yaml_list__(constructor_args, yaml_tag=yaml_tag)  # type: ignore
+    constructor_args = read_node(loader, node)
+    return getattr(cls, from_yaml_method_name)(constructor_args, yaml_tag=yaml_tag)  # type: ignore
 
-    elif isinstance(node, MappingNode):
-        constructor_args = read_yaml_node_as_dict(loader, node)
-        return cls.__from_yaml_dict__(constructor_args, yaml_tag=yaml_tag)  # type: ignore
 
-    else:
-        raise TypeError("Unknown type of yaml node: %r. Please report this to `yamlable` project." % type(node))
+def _with_libyaml_variants(loaders_or_dumpers  # type: Iterable[type]
+                           ):
+    # type: (...) -> List[type]
+    """
+    Returns the given pyyaml loaders or dumpers, each followed by its libyaml-based equivalent if available, so that
+    custom constructors and representers work whatever the implementation used for parsing/emitting.
+
+    :param loaders_or_dumpers:
+    :return:
+    """
+    res = []  # type: List[type]
+    for c in loaders_or_dumpers:
+        for _c in (c, _LIBYAML_VARIANTS.get(c, None)):
+            if _c is not None and _c not in res:
+                res.append(_c)
+    return res
+
+
+def _register_constructor(loaders,       # type: Iterable[type]
+                          tag,           # type: str
+                          constructor,   # type: Callable
+                          multi=False    # type: bool
+                          ):
+    # type: (...) -> None
+    """
+    Registers `constructor` for yaml tag `tag` (or for all yaml tags starting with `tag` if `multi` is True) on all
+    `loaders` and on their libyaml-based equivalents. This is the single registration point used in yamlable.
+
+    :param loaders:
+    :param tag:
+    :param constructor:
+    :param multi:
+    :return:
+    """
+    for loader in _with_libyaml_variants(loaders):
+        if multi:
+            loader.add_multi_constructor(tag, constructor)
+        else:
+            loader.add_constructor(tag, constructor)
+
+
+def _register_representer(dumpers,      # type: Iterable[type]
+                          typ,          # type: type
+                          representer,  # type: Callable
+                          multi=False   # type: bool
+                          ):
+    # type: (...) -> None
+    """
+    Registers `representer` for type `typ` (or for all subclasses of `typ` if `multi` is True) on all `dumpers` and on
+    their libyaml-based equivalents. This is the single registration point used in yamlable.
+
+    :param dumpers:
+    :param typ:
+    :param representer:
+    :param multi:
+    :return:
+    """
+    _register_representers(dumpers, (typ,), representer, multi=multi)
+
+
+def _register_representers(dumpers,      # type: Iterable[type]
+                           types,        # type: Iterable[type]
+                           representer,  # type: Callable
+                           multi=False   # type: bool
+                           ):
+    # type: (...) -> None
+    """
+    Same as `_register_representer` for several types at once: the list of dumpers (with their libyaml-based
+    equivalents) is only computed once.
+
+    :param dumpers:
+    :param types:
+    :param representer:
+    :param multi:
+    :return:
+    """
+    dumpers = _with_libyaml_variants(dumpers)
+    for typ in types:
+        for dumper in dumpers:
+            if multi:
+                dumper.add_multi_representer(typ, representer)
+            else:
+                dumper.add_representer(typ, representer)
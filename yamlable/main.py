@@ -3,36 +3,31 @@
 #
 #  License: 3-clause BSD, <https://github.com/smarie/python-yamlable/blob/master/LICENSE>
 
-try:
-    from collections.abc import Mapping
-except ImportError:
-    from collections import Mapping
-
 from abc import abstractmethod, ABCMeta
+from collections import deque
+from collections.abc import Mapping
+from sys import intern
+from weakref import ref, WeakValueDictionary
 
-import six
+from typing import TypeVar, Callable, Iterable, Any, Tuple, Dict, Set, List, Sequence, Type
 
-try:  # python 3.5+
-    from typing import TypeVar, Callable, Iterable, Any, Tuple, Dict, Set, List, Sequence
-
-    YA = TypeVar('YA', bound='YamlAble')
-    T = TypeVar('T')
-except ImportError:
-    pass
-
-try:  # python 3.5.4+
-    from typing import Type
-except ImportError:
-    pass  # normal for old versions of typing
-
-from yaml import Loader, SafeLoader, Dumper, SafeDumper, MappingNode, ScalarNode, SequenceNode
+from yaml import Loader, SafeLoader, Dumper, SafeDumper, MappingNode
 
 from yamlable.base import AbstractYamlObject, read_yaml_node_as_yamlobject, read_yaml_node_as_dict, \
-    read_yaml_node_as_sequence, read_yaml_node_as_scalar
+    read_yaml_node_as_sequence, read_yaml_node_as_scalar, _register_constructor, _register_representer, \
+    _register_representers, _has_legacy_method, _make_to_yaml_dict, _vars_and_slots, \
+    _DEFAULT_TO_YAML_DICT
 from yamlable.yaml_objects import YamlObject2
 
+YA = TypeVar('YA', bound='YamlAble')
+T = TypeVar('T')
 
-YAMLABLE_PREFIX = '!yamlable/'
+# interned, as all the yaml tags used as dict keys in pyyaml registries and in yamlable
+YAMLABLE_PREFIX = intern('!yamlable/')
+
+_TAG_REGISTRY = WeakValueDictionary()  # type: WeakValueDictionary[str, Type[YamlAble]]
+""" The YamlAble classes decorated with @yaml_info, by yaml tag suffix. Used by `decode_yamlable` for direct lookup.
+Classes are only referenced weakly, so that classes created dynamically (for example in tests) can be collected. """
 
 
 class AbstractYamlAble(AbstractYamlObject):
@@ -40,6 +35,7 @@ class AbstractYamlAble(AbstractYamlObject):
     The abstract part of YamlAble. It might be useful to inherit if you want to create a super class for several
     classes, with the same YamlAble behaviour.
     """
+    __slots__ = ()
 
     @classmethod
     @abstractmethod
@@ -71,11 +67,28 @@ class YamlAble(AbstractYamlAble):
      - optionally override `__from_yaml_dict__` (class method called during decoding) and/or `__to_yaml_dict__`
     (instance method called during encoding) if you wish to have control on the process, for example to only dump part
     of the attributes or perform some custom instance creation. Note that default implementation relies on `vars(self)`
-    for dumping and on `cls(**dct)` for loading.
+    (completed with the attributes stored in `__slots__` if any) for dumping and on `cls(**dct)` for loading.
+     - optionally fill `__yaml_slots__` with the names of the attributes to dump. The `@yaml_info()` decorator will then
+    generate a fast `__to_yaml_dict__` for them.
+     - optionally declare `__slots__` to store the attributes in slots: `YamlAble` itself has no instance attribute so
+    instances of such classes have no `__dict__`, which saves memory and speeds up attribute access.
+
+    Subclasses that override `__init_subclass__` should call `super().__init_subclass__()`, so that they are found when
+    decoding.
     """
+    __slots__ = ()
+
     __yaml_tag_suffix__ = None
     """ placeholder for a class-wide yaml tag. It will be prefixed with '!yamlable/', stored in `YAMLABLE_PREFIX` """
 
+    __yaml_slots__ = None
+    """ optional names of the attributes to dump. If set, `@yaml_info` generates the `__to_yaml_dict__` method """
+
+    def __init_subclass__(cls, **kwargs):
+        super(YamlAble, cls).__init_subclass__(**kwargs)
+        # a new class that `decode_yamlable` may have to try: the cached list of subclasses is outdated
+        _clear_yamlable_subclasses()
+
     @classmethod
     def is_yaml_tag_supported(cls,
                               yaml_tag  # type: str
@@ -89,14 +102,15 @@ class YamlAble(AbstractYamlAble):
         :param yaml_tag:
         :return:
         """
-        if hasattr(cls, '__yaml_tag_suffix__') and cls.__yaml_tag_suffix__ is not None:
-            if '__yaml_tag_suffix__' in cls.__dict__:
-                # this is an explicitly configured class (__yaml_tag_suffix__ is set on it), ok
-                return cls.__yaml_tag_suffix__ == yaml_tag
-            else:
-                # this class inherits from the __yaml_tag_suffix__ and does not redefine it, not ok
-                raise TypeError("`__yaml_tag_suffix__` field is not redefined by class {}, cannot inherit from YamlAble"
-                                "properly.".format(cls))
+        # fast path: this is an explicitly configured class (__yaml_tag_suffix__ is set on it), ok
+        suffix = cls.__dict__.get('__yaml_tag_suffix__', None)
+        if suffix is not None:
+            return suffix == yaml_tag
+
+        if getattr(cls, '__yaml_tag_suffix__', None) is not None:
+            # this class inherits from the __yaml_tag_suffix__ and does not redefine it, not ok
+            raise TypeError("`__yaml_tag_suffix__` field is not redefined by class {}, cannot inherit from YamlAble"
+                            "properly.".format(cls))
 
         else:
             raise NotImplementedError("class {} does not seem to have a non-None '__yaml_tag_suffix__' field. You can "
@@ -139,6 +153,9 @@ def yaml_info(yaml_tag=None,     # type: str
     print(Foo().dumps_yaml())  # yields "!yamlable/com.example.Foo {}"
     ```
 
+    If several classes are decorated with the same yaml tag suffix, objects with this tag are decoded with the last
+    decorated class.
+
     :param yaml_tag: the complete yaml suffix.
     :param yaml_tag_ns: the yaml namespace. It will be appended with '.<cls.__name__>'
     :return:
@@ -214,7 +231,20 @@ def yaml_info_decorate(cls,               # type: Type[YA]
         if yaml_tag.startswith('!'):
             raise ValueError("When extending YamlAble, the `yaml_tag` field should only contain the yaml tag suffix, "
                              "and should therefore NOT start with !")
-        cls.__yaml_tag_suffix__ = yaml_tag  # type: ignore
+        # intern the suffix: it is compared with the tag of each decoded node in `is_yaml_tag_supported`
+        cls.__yaml_tag_suffix__ = intern(yaml_tag)  # type: ignore
+        _TAG_REGISTRY[cls.__yaml_tag_suffix__] = cls
+        # precompute the full tag for `encode_yamlable`, with the suffix it was built from
+        cls.__yamlable_full_tag__ = (cls.__yaml_tag_suffix__,  # type: ignore
+                                     intern(YAMLABLE_PREFIX + cls.__yaml_tag_suffix__))
+
+        # generate a specialized `__to_yaml_dict__` if the attributes to dump are declared, and not dumped by user code
+        if cls.__yaml_slots__ is not None and not _has_legacy_method(cls, 'to_yaml_dict') \
+                and (cls.__to_yaml_dict__ is _DEFAULT_TO_YAML_DICT
+                     or getattr(cls.__to_yaml_dict__, '__yamlable_generated__', False)):
+            # private names are mangled with the name of the class declaring them (it may be a parent)
+            owner = next(c for c in cls.__mro__ if '__yaml_slots__' in c.__dict__)
+            cls.__to_yaml_dict__ = _make_to_yaml_dict(cls.__yaml_slots__, owner.__name__)  # type: ignore
     else:
         raise TypeError("classes tagged with @yaml_info should be subclasses of YamlAble or YamlObject2")
 
@@ -236,23 +266,96 @@ def decode_yamlable(loader,
     :param kwargs:
     :return:
     """
-    candidates = _get_all_subclasses(YamlAble)
-    errors = dict()
+    # the exceptions raised by the classes tried, and these classes: each class is tried at most once, so that a
+    # failing __init__ is not called several times, and its error is reported (not hidden by a retry)
+    errors = dict()  # type: Dict[str, Any]
+    tried = set()  # type: Set[Type[YamlAble]]
+
+    # fast path: a class registered for this tag with @yaml_info. Still ask it, since the tag may have been changed
+    clazz = _TAG_REGISTRY.get(yaml_tag, None)
+    if clazz is not None:
+        res = _decode_with_candidates((clazz,), loader, yaml_tag, node, errors, tried)
+        if res is not _NOT_DECODED:
+            return res  # type: ignore
+
+    candidates = _get_yamlable_subclasses()
+    res = _decode_with_candidates(candidates, loader, yaml_tag, node, errors, tried)
+    if res is not _NOT_DECODED:
+        return res  # type: ignore
+
+    raise _YamlAbleDecodeError(yaml_tag, candidates, errors)
+
+
+class _YamlAbleDecodeError(TypeError):
+    """
+    The TypeError raised by `decode_yamlable` when no class can decode a node. Its message, that contains the
+    representation of all candidate classes and errors, is only created when needed, for example not when the error
+    is caught by a "try to load, else fallback" caller.
+    """
+    def __init__(self,
+                 yaml_tag,    # type: str
+                 candidates,  # type: Iterable[Type[YamlAble]]
+                 errors       # type: Dict[str, Any]
+                 ):
+        super(_YamlAbleDecodeError, self).__init__(yaml_tag, candidates, errors)
+        self.yaml_tag = yaml_tag
+        self.candidates = candidates
+        self.errors = errors
+
+    def __str__(self):
+        # the candidates that did not raise any error simply do not support the tag
+        errors = {c.__name__: self.errors.get(c.__name__, _TAG_NOT_SUPPORTED % self.yaml_tag)
+                  for c in self.candidates}
+        return ("No YamlAble subclass found able to decode object '!yamlable/" + self.yaml_tag + "'. Tried classes: "
+                + str(list(self.candidates)) + ". Caught errors: " + str(errors) + ". "
+                "Please check the value of <cls>.__yaml_tag_suffix__ on these classes. Note that this value may be "
+                "set using @yaml_info() so help(yaml_info) might help too.")
+
+    def __repr__(self):
+        # used when this error is reported in the message of the error of an enclosing object
+        return "%s(%r)" % (TypeError.__name__, str(self))
+
+
+_NOT_DECODED = object()
+""" Sentinel returned by `_decode_with_candidates` when no candidate class could decode the node """
+
+_TAG_NOT_SUPPORTED = "yaml tag %r is not supported."
+
+
+def _decode_with_candidates(candidates,  # type: Iterable[Type[YamlAble]]
+                            loader,
+                            yaml_tag,    # type: str
+                            node,        # type: MappingNode
+                            errors,      # type: Dict[str, Any]
+                            tried        # type: Set[Type[YamlAble]]
+                            ):
+    # type: (...) -> Any
+    """
+    Decodes `node` with the first class in `candidates` that supports `yaml_tag` and does not fail. `_NOT_DECODED` is
+    returned if no class succeeded.
+
+    :param candidates:
+    :param loader:
+    :param yaml_tag:
+    :param node:
+    :param errors: a dictionary where the exception raised by each failing class is stored. Classes that do not
+        support the tag are not stored, so that no error message is created on the hot path.
+    :param tried: the set of classes already tried. They are skipped, and the classes tried here are added to it.
+    :return:
+    """
     for clazz in candidates:
+        if clazz in tried:
+            continue
+        tried.add(clazz)
         try:
             if clazz.is_yaml_tag_supported(yaml_tag):
                 return read_yaml_node_as_yamlobject(
                     cls=clazz, loader=loader, node=node, yaml_tag=yaml_tag
                 )  # type: ignore
-            else:
-                errors[clazz.__name__] = "yaml tag %r is not supported." % yaml_tag
         except Exception as e:
             errors[clazz.__name__] = e
 
-    raise TypeError("No YamlAble subclass found able to decode object '!yamlable/" + yaml_tag + "'. Tried classes: "
-                    + str(candidates) + ". Caught errors: " + str(errors) + ". "
-                    "Please check the value of <cls>.__yaml_tag_suffix__ on these classes. Note that this value may be "
-                    "set using @yaml_info() so help(yaml_info) might help too.")
+    return _NOT_DECODED
 
 
 def encode_yamlable(dumper,
@@ -271,18 +374,30 @@ def encode_yamlable(dumper,
     :return:
     """
     # Convert objects to a dictionary of their representation
-    new_data = obj.__to_yaml_dict__()
+    obj_type = type(obj)
+    if obj_type.__to_yaml_dict__ is _DEFAULT_TO_YAML_DICT and not _has_legacy_method(obj_type, 'to_yaml_dict'):
+        # fast path: `__to_yaml_dict__` is not overridden, no need to call it to get vars(obj) (and the slots if any)
+        new_data = _vars_and_slots(obj)
+    else:
+        new_data = obj.__to_yaml_dict__()
 
     if without_custom_tag:
         # TODO check that it works
         return dumper.represent_mapping(None, new_data, flow_style=None)
     else:
         # Add the tag information
-        if not hasattr(obj, '__yaml_tag_suffix__') or obj.__yaml_tag_suffix__ is None:
+        yaml_tag_suffix = getattr(obj, '__yaml_tag_suffix__', None)
+        if yaml_tag_suffix is None:
             raise NotImplementedError("object {} does not seem to have a non-None '__yaml_tag_suffix__' field. You "
                                       "can either create one manually or by decorating your class with @yaml_info."
                                       "".format(obj))
-        yaml_tag = YAMLABLE_PREFIX + obj.__yaml_tag_suffix__
+
+        # reuse the tag precomputed by @yaml_info, unless the suffix was changed (on the object or on a subclass)
+        full_tag = getattr(obj_type, '__yamlable_full_tag__', None)
+        if full_tag is not None and full_tag[0] is yaml_tag_suffix:
+            yaml_tag = full_tag[1]
+        else:
+            yaml_tag = YAMLABLE_PREFIX + yaml_tag_suffix
         return dumper.represent_mapping(yaml_tag, new_data, flow_style=None)
 
 
@@ -299,17 +414,15 @@ ALL_PYYAML_DUMPERS = (Dumper, SafeDumper)
 def register_yamlable_codec(loaders=ALL_PYYAML_LOADERS, dumpers=ALL_PYYAML_DUMPERS):
     # type: (...) -> None
     """
-    Registers the yamlable encoder and decoder with all pyYaml loaders and dumpers.
+    Registers the yamlable encoder and decoder with all pyYaml loaders and dumpers. Their libyaml-based equivalents
+    (CLoader, CSafeLoader...) are registered too, when available.
 
     :param loaders:
     :param dumpers:
     :return:
     """
-    for loader in loaders:
-        loader.add_multi_constructor(YAMLABLE_PREFIX, decode_yamlable)
-
-    for dumper in dumpers:
-        dumper.add_multi_representer(YamlAble, encode_yamlable)
+    _register_constructor(loaders, YAMLABLE_PREFIX, decode_yamlable, multi=True)
+    _register_representer(dumpers, YamlAble, encode_yamlable, multi=True)
 
 
 # Register the YamlAble encoding and decoding functions
@@ -328,51 +441,89 @@ def _get_all_subclasses(typ,             # type: Type[T]
 
     :param typ:
     :param recursive: a boolean indicating whether recursion is needed
-    :param _memo: internal variable used in recursion to avoid exploring subclasses that were already explored
+    :param _memo: deprecated, not used anymore (the hierarchy is now explored iteratively, breadth-first)
     :return:
     """
-    _memo = _memo or set()
-
-    # if we have collected the subclasses for this already, return
-    if typ in _memo:
-        return []
-
-    # else remember that we have collected them, and collect them
-    _memo.add(typ)
     # if is_generic_type(typ):
     #     # We now use get_origin() to also find all the concrete subclasses in case the desired type is a generic
     #     sub_list = get_origin(typ).__subclasses__()
     # else:
-    sub_list = typ.__subclasses__()
-
-    # recurse
+    seen = {typ}  # type: Set[Type[Any]]
     result = []  # type: List[Type[T]]
-    for t in sub_list:
-        # only keep the origins in the list
-        # to = get_origin(t) or t
-        to = t
-        # noinspection PyBroadException
-        try:
-            if to is not typ and to not in result and issubclass(to, typ):  # is_subtype(to, typ, bound_typevars={}):
-                result.append(to)
-        except Exception:  # noqa
-            # catching an error with is_subtype(Dict, Dict[str, int], bound_typevars={})
-            pass
-
-    # recurse
-    if recursive:
-        for typpp in sub_list:
-            for t in _get_all_subclasses(typpp, recursive=True, _memo=_memo):
-                # unfortunately we have to check 't not in sub_list' because with generics strange things happen
-                # also is_subtype returns false when the parent is a generic
-                if t not in sub_list and issubclass(t, typ):  # is_subtype(t, typ, bound_typevars={}):
-                    result.append(t)
+    to_explore = deque(typ.__subclasses__())
+    while to_explore:
+        t = to_explore.popleft()
+        if t in seen:
+            # a class with several parents (diamond) is reachable several times
+            continue
+        seen.add(t)
+
+        # note: no need to check issubclass(t, typ), this is always true for classes found with __subclasses__()
+        result.append(t)
+
+        if recursive:
+            to_explore.extend(t.__subclasses__())
 
     return result
 
 
+_YAMLABLE_SUBCLASSES = None  # type: Tuple[ref, ...]
+""" Cache of `_get_all_subclasses(YamlAble)`, built on first decode and cleared by `YamlAble.__init_subclass__` when a
+new subclass is created. Classes are only referenced weakly, like in `__subclasses__()`, so that the cache does not keep
+them alive. """
+
+
+def _clear_yamlable_subclasses():
+    # type: (...) -> None
+    """
+    Clears the cache of `_get_yamlable_subclasses`, so that it is rebuilt on next call.
+
+    :return:
+    """
+    global _YAMLABLE_SUBCLASSES
+    _YAMLABLE_SUBCLASSES = None
+
+
+def _get_yamlable_subclasses():
+    # type: (...) -> Tuple[Type[YamlAble], ...]
+    """
+    Returns all subclasses of `YamlAble`, in hierarchy order, as a tuple. It is cached so that decoding a node does not
+    walk the whole class hierarchy. The cache is cleared each time a new subclass is created.
+
+    :return:
+    """
+    global _YAMLABLE_SUBCLASSES
+    if _YAMLABLE_SUBCLASSES is None:
+        _YAMLABLE_SUBCLASSES = tuple(ref(c) for c in _get_all_subclasses(YamlAble))
+
+    # snapshot of the classes that are still alive
+    return tuple(c for c in (r() for r in _YAMLABLE_SUBCLASSES) if c is not None)
+
+
+def _get_codec_tag_prefix(codec  # type: Type[YamlCodec]
+                          ):
+    # type: (...) -> str
+    """
+    Returns the yaml prefix of `codec`, ending with a '/', to be used when encoding objects. The result is cached on
+    the codec class itself so that the prefix is only computed once per codec class and not at each dump.
+
+    :param codec:
+    :return:
+    """
+    try:
+        # note: look in the class __dict__ only, so that each subclass has its own cached prefix
+        return codec.__dict__['_yamlable_tag_prefix']
+    except KeyError:
+        prefix = codec.get_yaml_prefix()
+        if not prefix.endswith('/'):
+            prefix = prefix + '/'
+        prefix = intern(prefix)
+        setattr(codec, '_yamlable_tag_prefix', prefix)
+        return prefix
+
+
 # ------------------------ Easy codecs ---------------
-class YamlCodec(six.with_metaclass(ABCMeta, object)):
+class YamlCodec(metaclass=ABCMeta):
     """
     Represents a codec class, able to encode several object types into/from yaml, with potentially different yaml tag
     ids. It assumes that the objects are written as yaml dictionaries, and that they all have the same yaml tag prefix
@@ -417,18 +568,19 @@ class YamlCodec(six.with_metaclass(ABCMeta, object)):
         """
         if cls.is_yaml_tag_supported(yaml_tag_suffix):
             # Note: same as in read_yaml_node_as_yamlobject but different yaml tag handling so code copy
+            # dispatch on the `id` string of the pyyaml node classes, most common case first
+            node_id = node.id
+            if node_id == 'mapping':
+                constructor_args = read_yaml_node_as_dict(loader, node)
+                return cls.from_yaml_dict(yaml_tag_suffix, constructor_args, **kwargs)  # type: ignore
 
-            if isinstance(node, ScalarNode):
-                constructor_args = read_yaml_node_as_scalar(loader, node)
-                return cls.from_yaml_scalar(yaml_tag_suffix, constructor_args, **kwargs)  # type: ignore
-
-            elif isinstance(node, SequenceNode):
+            elif node_id == 'sequence':
                 constructor_args = read_yaml_node_as_sequence(loader, node)
                 return cls.from_yaml_list(yaml_tag_suffix, constructor_args, **kwargs)  # type: ignore
 
-            elif isinstance(node, MappingNode):
-                constructor_args = read_yaml_node_as_dict(loader, node)
-                return cls.from_yaml_dict(yaml_tag_suffix, constructor_args, **kwargs)  # type: ignore
+            elif node_id == 'scalar':
+                constructor_args = read_yaml_node_as_scalar(loader, node)
+                return cls.from_yaml_scalar(yaml_tag_suffix, constructor_args, **kwargs)  # type: ignore
 
             else:
                 raise TypeError("Unknown type of yaml node: %r. Please report this to `yamlable` project." % type(node))
@@ -440,7 +592,9 @@ class YamlCodec(six.with_metaclass(ABCMeta, object)):
                               ):
         # type: (...) -> bool
         """
-        Implementing classes should return True if they are able to decode yaml objects with this yaml tag.
+        Implementing classes should return True if they are able to decode yaml objects with this yaml tag. This is
+        called for each decoded node, so prefer a direct lookup such as `yaml_tag_suffix in my_tags_dict` (and not
+        `in my_tags_dict.keys()`, or a loop).
 
         :param yaml_tag_suffix:
         :return:
@@ -524,7 +678,9 @@ class YamlCodec(six.with_metaclass(ABCMeta, object)):
         """
         # Convert objects to a dictionary of their representation
         yaml_tag_suffix, obj_as_dict = cls.to_yaml_dict(obj)
-        if not isinstance(obj_as_dict, Mapping) or not isinstance(yaml_tag_suffix, str):
+        # note: the exact type check for dict avoids the (slower) abc instance check in most cases
+        if (type(obj_as_dict) is not dict and not isinstance(obj_as_dict, Mapping)) \
+                or not isinstance(yaml_tag_suffix, str):
             raise TypeError("`to_yaml_dict` did not return correct results. It should return a tuple of "
                             "`yaml_tag_suffix, obj_as_dict`")
 
@@ -533,10 +689,7 @@ class YamlCodec(six.with_metaclass(ABCMeta, object)):
             return dumper.represent_mapping(None, obj_as_dict, flow_style=None)
         else:
             # Add the tag information
-            prefix = cls.get_yaml_prefix()
-            if len(prefix) == 0 or prefix[-1] != '/':
-                prefix = prefix + '/'
-            yaml_tag = prefix + yaml_tag_suffix
+            yaml_tag = _get_codec_tag_prefix(cls) + yaml_tag_suffix
             return dumper.represent_mapping(yaml_tag, obj_as_dict, flow_style=None)
 
     @classmethod
@@ -561,14 +714,11 @@ class YamlCodec(six.with_metaclass(ABCMeta, object)):
          - The decoding part is registered for the yaml prefix in cls.get_yaml_prefix()
 
         :param loaders: the PyYaml loaders to register this codec with. By default all pyyaml loaders are considered
-            (Loader, SafeLoader...)
+            (Loader, SafeLoader...). Their libyaml-based equivalents are registered too, when available.
         :param dumpers: the PyYaml dumpers to register this codec with. By default all pyyaml loaders are considered
-            (Dumper, SafeDumper...)
+            (Dumper, SafeDumper...). Their libyaml-based equivalents are registered too, when available.
         :return:
         """
-        for loader in loaders:
-            loader.add_multi_constructor(cls.get_yaml_prefix(), cls.decode)
+        _register_constructor(loaders, intern(cls.get_yaml_prefix()), cls.decode, multi=True)
 
-        for dumper in dumpers:
-            for t in cls.get_known_types():
-                dumper.add_multi_representer(t, cls.encode)
+        _register_representers(dumpers, cls.get_known_types(), cls.encode, multi=True)
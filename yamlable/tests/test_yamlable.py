@@ -1,23 +1,8 @@
 from copy import copy
-try:
-    # Python 2 only:
-    from StringIO import StringIO
-
-    # create a variant that can serve as a context manager
-    class StringIO(StringIO):
-        def __enter__(self):
-            return self
-        def __exit__(self, exception_type, exception_value, traceback):
-            self.close()
-
-except ImportError:
-    from io import StringIO
-
-try: # python 3.5+
-    from typing import Dict, Any
-    from yamlable import Y
-except ImportError:
-    pass
+from io import StringIO
+
+from typing import Dict, Any
+from yamlable import Y
 
 import pytest
 from yaml import dump, safe_load
@@ -90,26 +75,23 @@ a: 1
 b: hello
 """
 
-    # dump io
-    class MemorizingStringIO(StringIO):
-        """ A StringIO object that memorizes its buffer when it is closed (as opposed to the standard StringIO) """
-        def close(self):
-            self.value = self.getvalue()
-            # super(StringIO, self).close()  # this does not work with python 2 old-style classes (StringIO is one)
-            StringIO.close(self)
-
-    s = MemorizingStringIO()
+    # dump io (the stream is left open for the caller)
+    s = StringIO()
     f.dump_yaml(s, default_flow_style=False)
-    assert s.value == y
+    assert not s.closed
+    assert s.getvalue() == y
 
     # dump pyyaml
     assert dump(f, default_flow_style=False) == y
 
     # load
     assert f == Foo.loads_yaml(y)
+    assert f == Foo.loads_yaml(y, safe=False)
 
-    # load io
-    assert f == Foo.load_yaml(StringIO(y))
+    # load io (the stream is left open for the caller)
+    s = StringIO(y)
+    assert f == Foo.load_yaml(s)
+    assert not s.closed
 
     # load pyyaml
     assert f == safe_load(y)
@@ -178,17 +160,11 @@ a: 1
 b: hello
 """
 
-    # dump io
-    class MemorizingStringIO(StringIO):
-        """ A StringIO object that memorizes its buffer when it is closed (as opposed to the standard StringIO) """
-        def close(self):
-            self.value = self.getvalue()
-            # super(StringIO, self).close()  # this does not work with python 2 old-style classes (StringIO is one)
-            StringIO.close(self)
-
-    s = MemorizingStringIO()
+    # dump io (the stream is left open for the caller)
+    s = StringIO()
     f.dump_yaml(s, default_flow_style=False)
-    assert s.value == y
+    assert not s.closed
+    assert s.getvalue() == y
 
     # dump pyyaml
     assert dump(f, default_flow_style=False) == y
@@ -246,6 +222,41 @@ def test_yamlable_not_supported():
     assert "No YamlAble subclass found able to decode object" in str(err_info.value)
 
 
+def test_yamlable_decode_error_root_cause():
+    """ Tests that a failing class is only constructed once, and that the error of a nested object is reported """
+
+    calls = []
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Fail(YamlAble):
+        def __init__(self, b):
+            calls.append(b)
+            if b == 'bad':
+                raise ValueError('bad')
+            self.b = b
+
+    # a failing object, nested 5 levels deep
+    s = "bad"
+    for _ in range(5):
+        s = "!yamlable/yaml.tests.Foo_Fail {b: %s}" % s
+
+    with pytest.raises(TypeError) as err_info:
+        Foo_Fail.loads_yaml(s)
+
+    # __init__ was called only once, on the innermost object: the others could not be created
+    assert calls == ['bad']
+    msg = str(err_info.value)
+    assert "ValueError(" in msg
+    assert "recursive" not in msg
+
+    # the root cause is the error of the innermost object
+    err, depth = err_info.value, 0
+    while isinstance(err, TypeError):
+        err, depth = err.errors['Foo_Fail'], depth + 1
+    assert depth == 5
+    assert isinstance(err, ValueError) and str(err) == 'bad'
+
+
 def test_yamlable_default_impl():
     """ tests that the default implementation works """
 
@@ -334,18 +345,11 @@ a: 1
 b: hello
 """
 
-    # dump io
-    class MemorizingStringIO(StringIO):
-        """ A StringIO object that memorizes its buffer when it is closed (as opposed to the standard StringIO) """
-
-        def close(self):
-            self.value = self.getvalue()
-            # super(StringIO, self).close()  # this does not work with python 2 old-style classes (StringIO is one)
-            StringIO.close(self)
-
-    s = MemorizingStringIO()
+    # dump io (the stream is left open for the caller)
+    s = StringIO()
     f.dump_yaml(s, default_flow_style=False)
-    assert s.value == y
+    assert not s.closed
+    assert s.getvalue() == y
 
     # dump pyyaml
     assert dump(f, default_flow_style=False) == y
@@ -358,3 +362,300 @@ b: hello
 
     # load pyyaml
     assert f == safe_load(y)
+
+
+def test_yamlable_libyaml():
+    """ Tests that YamlAble objects can be dumped and loaded with the libyaml-based CSafeLoader/CSafeDumper """
+    try:
+        from yaml import CSafeLoader, CSafeDumper
+    except ImportError:
+        pytest.skip("libyaml is not available")
+
+    from yaml import load
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_C(YamlAble):
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        def __eq__(self, other):
+            return vars(self) == vars(other)
+
+    f = Foo_C(1, 'hello')
+    s = """!yamlable/yaml.tests.Foo_C
+a: 1
+b: hello
+"""
+    assert dump(f, Dumper=CSafeDumper, default_flow_style=False) == s
+    assert load(s, Loader=CSafeLoader) == f
+
+
+def test_yamlable_file(tmpdir):
+    """ Tests that YamlAble objects can be dumped to and loaded from a file path """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_File(YamlAble):
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        def __eq__(self, other):
+            return vars(self) == vars(other)
+
+    f = Foo_File(1, u'h\xe9llo')
+    p = str(tmpdir.join('foo.yaml'))
+    f.dump_yaml(p, default_flow_style=False, allow_unicode=True)
+
+    with open(p, mode='rb') as b:
+        assert b.read().decode('utf-8') == u"""!yamlable/yaml.tests.Foo_File
+a: 1
+b: h\xe9llo
+"""
+
+    assert Foo_File.load_yaml(p) == f
+
+
+def test_yamlable_load_all():
+    """ Tests that multi-document yaml streams can be loaded """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_All(YamlAble):
+        def __init__(self, a):
+            self.a = a
+
+        def __eq__(self, other):
+            return vars(self) == vars(other)
+
+    s = """--- !yamlable/yaml.tests.Foo_All
+a: 1
+--- !yamlable/yaml.tests.Foo_All
+a: 2
+"""
+    assert list(Foo_All.loads_all_yaml(s)) == [Foo_All(1), Foo_All(2)]
+
+    stream = StringIO(s)
+    assert list(Foo_All.load_all_yaml(stream)) == [Foo_All(1), Foo_All(2)]
+    assert not stream.closed
+
+    # documents are loaded lazily: the invalid one is only reached at the end
+    docs = Foo_All.loads_all_yaml(s + "--- 1\n")
+    assert next(docs) == Foo_All(1)
+    assert next(docs) == Foo_All(2)
+    with pytest.raises(TypeError):
+        next(docs)
+
+
+def test_yamlable_dump_all():
+    """ Tests that several objects can be dumped as a multi-document yaml stream """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_DumpAll(YamlAble):
+        def __init__(self, a):
+            self.a = a
+
+        def __eq__(self, other):
+            return vars(self) == vars(other)
+
+    objs = [Foo_DumpAll(1), Foo_DumpAll(2)]
+    s = Foo_DumpAll.dumps_all_yaml(objs, default_flow_style=False)
+    assert s == """!yamlable/yaml.tests.Foo_DumpAll
+a: 1
+--- !yamlable/yaml.tests.Foo_DumpAll
+a: 2
+"""
+    assert list(Foo_DumpAll.loads_all_yaml(s)) == objs
+
+    stream = StringIO()
+    Foo_DumpAll.dump_all_yaml(objs, stream, default_flow_style=False)
+    assert stream.getvalue() == s
+    assert not stream.closed
+
+
+def test_yamlable_slots():
+    """ Tests that attributes declared in __yaml_slots__ are dumped, even if they are stored in __slots__ """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Slots(YamlAble):
+        __slots__ = ('a', 'b')
+        __yaml_slots__ = ('a', 'b')
+
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        def __eq__(self, other):
+            return (self.a, self.b) == (other.a, other.b)
+
+    f = Foo_Slots(1, 'hello')
+    y = """!yamlable/yaml.tests.Foo_Slots
+a: 1
+b: hello
+"""
+    assert f.dumps_yaml(default_flow_style=False) == y
+    assert Foo_Slots.loads_yaml(y) == f
+    # YamlAble does not add a __dict__
+    assert not hasattr(f, '__dict__')
+
+    # without __yaml_slots__, the default implementation finds the slots too
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Slots2(YamlAble):
+        __slots__ = ('a', '__b', '__dict__')
+
+        def __init__(self, a, b=None):
+            self.a = a
+            if b is not None:
+                self.__b = b
+            self.c = 'in dict'
+
+        def __eq__(self, other):
+            return self.__to_yaml_dict__() == other.__to_yaml_dict__()
+
+        @classmethod
+        def __from_yaml_dict__(cls,  # type: Type[Y]
+                               dct,  # type: Dict[str, Any]
+                               yaml_tag  # type: str
+                               ):
+            # type: (...) -> Y
+            # the private attribute is dumped with its mangled name, as for attributes stored in __dict__
+            return cls(dct['a'], dct.get('_Foo_Slots2__b', None))
+
+    # a private slot is dumped under its mangled name, so that it round-trips
+    f2 = Foo_Slots2(1, 2)
+    assert Foo_Slots2.loads_yaml(f2.dumps_yaml()) == f2
+    assert Foo_Slots2(1).dumps_yaml(default_flow_style=False) == """!yamlable/yaml.tests.Foo_Slots2
+a: 1
+c: in dict
+"""
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Slots3(YamlAble):
+        __slots__ = ('a',)
+
+        def __init__(self, a):
+            self.a = a
+
+    assert Foo_Slots3(1).__to_yaml_dict__() == {'a': 1}
+    assert Foo_Slots3.loads_yaml(Foo_Slots3(1).dumps_yaml()).a == 1
+
+    with pytest.raises(ValueError):
+        @yaml_info(yaml_tag_ns='yaml.tests')
+        class Foo_Slots_Err(YamlAble):
+            __yaml_slots__ = ('a', 'not valid')
+
+    # private names in __yaml_slots__ are mangled, and dumped with their mangled name like vars(self) would
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Slots_Private(YamlAble):
+        __slots__ = ('a', '__b')
+        __yaml_slots__ = ('a', '__b')
+
+        def __init__(self, a, b):
+            self.a = a
+            self.__b = b
+
+    assert Foo_Slots_Private(1, 2).dumps_yaml(default_flow_style=False) == """!yamlable/yaml.tests.Foo_Slots_Private
+_Foo_Slots_Private__b: 2
+a: 1
+"""
+
+
+def test_yamlable_new_subclass_after_decode():
+    """ Tests that classes created after a first decoding are found, even though the list of subclasses is cached """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Before(YamlAble):
+        pass
+
+    assert isinstance(Foo_Before.loads_yaml("!yamlable/yaml.tests.Foo_Before {}"), Foo_Before)
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_After(YamlAble):
+        pass
+
+    assert isinstance(Foo_After.loads_yaml("!yamlable/yaml.tests.Foo_After {}"), Foo_After)
+
+    # not decorated with @yaml_info: only found in the list of subclasses, that is updated when the class is created
+    class Foo_After_Manual(YamlAble):
+        __yaml_tag_suffix__ = 'yaml.tests.Foo_After_Manual'
+
+    assert isinstance(Foo_After_Manual.loads_yaml("!yamlable/yaml.tests.Foo_After_Manual {}"), Foo_After_Manual)
+
+    with pytest.raises(TypeError):
+        Foo_After.loads_yaml("!yamlable/yaml.tests.Foo_Unknown {}")
+
+
+def test_yamlable_tag_collision():
+    """ Tests that when several classes are decorated with the same yaml tag, the last decorated one is used """
+
+    @yaml_info('yaml.tests.Foo_Dup')
+    class Foo_Dup(YamlAble):
+        pass
+
+    @yaml_info('yaml.tests.Foo_Dup')
+    class Foo_Dup2(Foo_Dup):
+        pass
+
+    assert type(Foo_Dup.loads_yaml("!yamlable/yaml.tests.Foo_Dup {}")) is Foo_Dup2
+    assert Foo_Dup().dumps_yaml() == Foo_Dup2().dumps_yaml() == "!yamlable/yaml.tests.Foo_Dup {}\n"
+
+
+def test_get_all_subclasses():
+    """ Tests that the subclasses are listed once, breadth-first, even with diamond inheritance """
+    from yamlable.main import _get_all_subclasses
+
+    class A(object):
+        pass
+
+    class B(A):
+        pass
+
+    class C(A):
+        pass
+
+    class D(B, C):
+        pass
+
+    assert _get_all_subclasses(A) == [B, C, D]
+    assert _get_all_subclasses(A, recursive=False) == [B, C]
+
+
+def test_yamlable_tag_override():
+    """ Tests that overriding the yaml tag suffix on an instance or on a subclass is taken into account when dumping """
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Tag(YamlAble):
+        pass
+
+    class Foo_Tag2(Foo_Tag):
+        __yaml_tag_suffix__ = 'yaml.tests.Foo_Tag2'
+
+    f = Foo_Tag()
+    assert f.dumps_yaml() == "!yamlable/yaml.tests.Foo_Tag {}\n"
+    f.__yaml_tag_suffix__ = 'yaml.tests.changed'
+    assert f.dumps_yaml().startswith("!yamlable/yaml.tests.changed\n")
+    assert Foo_Tag2().dumps_yaml() == "!yamlable/yaml.tests.Foo_Tag2 {}\n"
+
+
+def test_yamlable_classes_not_kept_alive():
+    """ Tests that the caches used for decoding do not prevent YamlAble classes from being garbage-collected """
+    import gc
+    from weakref import ref
+    from yamlable.main import _TAG_REGISTRY, _get_yamlable_subclasses
+
+    @yaml_info(yaml_tag_ns='yaml.tests')
+    class Foo_Gc(YamlAble):
+        pass
+
+    class Foo_Gc2(YamlAble):
+        # not decorated: found by exploring the subclasses
+        __yaml_tag_suffix__ = 'yaml.tests.Foo_Gc2'
+
+    assert isinstance(Foo_Gc.loads_yaml("!yamlable/yaml.tests.Foo_Gc {}"), Foo_Gc)
+    assert isinstance(Foo_Gc2.loads_yaml("!yamlable/yaml.tests.Foo_Gc2 {}"), Foo_Gc2)
+    assert Foo_Gc2 in _get_yamlable_subclasses()
+
+    refs = ref(Foo_Gc), ref(Foo_Gc2)
+    del Foo_Gc, Foo_Gc2
+    gc.collect()
+    assert all(r() is None for r in refs)
+    assert 'yaml.tests.Foo_Gc' not in _TAG_REGISTRY
@@ -1,9 +1,6 @@
 import pytest
 
-try:  # python 3.5+
-    from typing import Tuple, Any, Iterable, Dict
-except ImportError:
-    pass
+from typing import Tuple, Any, Iterable, Dict
 
 from yaml import dump, safe_load
 
@@ -50,7 +47,7 @@ def test_yamlcodec():
                                   yaml_tag_suffix  # type: str
                                   ):
             # type: (...) -> bool
-            return yaml_tag_suffix in yaml_tags_to_types.keys()
+            return yaml_tag_suffix in yaml_tags_to_types
 
         @classmethod
         def from_yaml_dict(cls,
@@ -1,9 +1,6 @@
 from copy import copy
-try:  # python 3.5+
-    from typing import Dict, Any
-    from yamlable import Y
-except ImportError:
-    pass
+from typing import Dict, Any
+from yamlable import Y
 
 import pytest
 
@@ -165,3 +162,56 @@ def test_sequence():
 """)
 
     assert h_scalar == HeroY("Welthyr Syxgon")
+
+
+def test_yamlobject_libyaml():
+    """ Tests that YamlObject2 subclasses are registered on the libyaml-based loaders and dumpers too """
+    try:
+        from yaml import CSafeLoader, CDumper
+    except ImportError:
+        pytest.skip("libyaml is not available")
+
+    from yaml import load, dump
+
+    class FooC(YamlObject2):
+        yaml_tag = '!foo_c'
+
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        def __eq__(self, other):
+            return vars(self) == vars(other)
+
+    f = FooC(1, 'hello')
+    s = """!foo_c
+a: 1
+b: hello
+"""
+    assert dump(f, Dumper=CDumper, default_flow_style=False) == s
+    assert load(s, Loader=CSafeLoader) == f
+
+
+def test_yamlobject_slots():
+    """ Tests that YamlObject2 subclasses can store their attributes in __slots__ """
+
+    class FooSlots(YamlObject2):
+        yaml_tag = '!foo_slots'
+        __slots__ = ('a', 'b')
+
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        def __eq__(self, other):
+            return (self.a, self.b) == (other.a, other.b)
+
+    f = FooSlots(1, 'hello')
+    assert not hasattr(f, '__dict__')
+
+    s = """!foo_slots
+a: 1
+b: hello
+"""
+    assert f.dumps_yaml(safe=False, default_flow_style=False) == s
+    assert FooSlots.loads_yaml(s) == f
@@ -4,23 +4,21 @@
 #  License: 3-clause BSD, <https://github.com/smarie/python-yamlable/blob/master/LICENSE>
 
 from abc import ABCMeta
+from sys import intern
 
-import six
+from typing import TypeVar, Type
 
-try:  # python 3.5+
-    from typing import TypeVar
+from yaml import YAMLObjectMetaclass, YAMLObject, SafeLoader, MappingNode
 
-    YO2 = TypeVar('YO2', bound='YamlObject2')
-except ImportError:
-    pass
-try:  # python 3.5.4+
-    from typing import Type
-except ImportError:
-    pass  # normal for old versions of typing
+from yamlable.base import AbstractYamlObject, read_yaml_node_as_yamlobject, _register_constructor, \
+    _register_representer, _has_legacy_method, _vars_and_slots, _DEFAULT_TO_YAML_DICT
 
-from yaml import YAMLObjectMetaclass, YAMLObject, SafeLoader, MappingNode
+YO2 = TypeVar('YO2', bound='YamlObject2')
+
+_MISSING = object()
+""" Sentinel used by `YAMLObjectMetaclassStrict` when `yaml_tag` is not set in the class body """
 
-from yamlable.base import AbstractYamlObject, read_yaml_node_as_yamlobject
+_TAG_NOT_REDEFINED = "`yaml_tag` field is not redefined by class %s, cannot inherit from YAMLObject properly"
 
 
 class YAMLObjectMetaclassStrict(YAMLObjectMetaclass):
@@ -33,25 +31,21 @@ class YAMLObjectMetaclassStrict(YAMLObjectMetaclass):
         # construct as usual
         super(YAMLObjectMetaclass, cls).__init__(name, bases, kwds)
 
-        # if yaml_tag is provided
-        if 'yaml_tag' in kwds:
-            # if cls.yaml_tag != NONE_IGNORE_CHECKS:
-            if kwds['yaml_tag'] is not None:
-                cls.yaml_loader.add_constructor(cls.yaml_tag, cls.from_yaml)
-                cls.yaml_dumper.add_representer(cls, cls.to_yaml)
-            else:
-                if 'yaml_tag' in cls.__dict__:
-                    # this is an explicitly disabled class (yaml_tag=None is set on it), ok
-                    pass
-                else:
-                    # this class inherits from the yaml_tag=None and does not redefine it, not ok
-                    raise TypeError("`yaml_tag` field is not redefined by class {}, cannot inherit from YAMLObject "
-                                    "properly. Note that abstract classes can set the tag explicitly to `None` to skip "
-                                    "this check. It won't disable the check for their subclasses".format(cls))
+        # the yaml_tag has to be set in the class body (`kwds` is the class namespace, no need to look at the bases)
+        yaml_tag = kwds.get('yaml_tag', _MISSING)
+        if yaml_tag is _MISSING:
+            raise TypeError(_TAG_NOT_REDEFINED % cls)
 
-        else:
-            raise TypeError("`yaml_tag` field is not redefined by class {}, cannot inherit from YAMLObject properly"
-                            "".format(cls))
+        elif yaml_tag is not None:
+            # intern the tag: it is used as a key in the pyyaml registries and for each dumped object
+            cls.yaml_tag = yaml_tag = intern(yaml_tag)
+            # as in pyyaml, `yaml_loader` may be a list. The libyaml-based equivalents are registered too
+            loaders = cls.yaml_loader if isinstance(cls.yaml_loader, list) else [cls.yaml_loader]
+            _register_constructor(loaders, yaml_tag, cls.from_yaml)
+            _register_representer([cls.yaml_dumper], cls, cls.to_yaml)
+
+        # else this is an explicitly disabled class (yaml_tag=None is set on it), ok. Note that this does not disable
+        # the check for its subclasses, since they do not have yaml_tag in their own class body.
 
 
 class ABCYAMLMeta(YAMLObjectMetaclassStrict, ABCMeta):
@@ -59,7 +53,7 @@ class ABCYAMLMeta(YAMLObjectMetaclassStrict, ABCMeta):
     pass
 
 
-class YamlObject2(six.with_metaclass(ABCYAMLMeta, AbstractYamlObject, YAMLObject)):
+class YamlObject2(AbstractYamlObject, YAMLObject, metaclass=ABCYAMLMeta):
     """
     A helper class to register a class as able to dump instances to yaml and to load them back from yaml.
 
@@ -74,14 +68,18 @@ class YamlObject2(six.with_metaclass(ABCYAMLMeta, AbstractYamlObject, YAMLObject
     You still have to
      - define `yaml_tag` either directly or using the @yaml_info() decorator
      - optionally override methods from AbstractYamlObject: __to_yaml_dict__ and __from_yaml_dict__
+     - optionally declare `__slots__` to store the attributes in slots: `YamlObject2` itself has no instance attribute
+    so instances of such classes have no `__dict__`, which saves memory and speeds up attribute access.
 
     Note: since this class extends YAMLObject, it relies on metaclass. You might therefore prefer to extend YamlAble
     instead.
     """
-    yaml_loader = SafeLoader  # explicitly use SafeLoader by default
+    __slots__ = ()
+
+    yaml_loader = SafeLoader  # explicitly use SafeLoader by default (CSafeLoader is registered too, when available)
     # yaml_dumper = Dumper
     yaml_tag = None
-    # yaml_flow_style = ...
+    yaml_flow_style = None  # as in YAMLObject: let the dumper decide
 
     @classmethod
     def to_yaml(cls,    # type: Type[YamlObject2]
@@ -96,7 +94,12 @@ class YamlObject2(six.with_metaclass(ABCYAMLMeta, AbstractYamlObject, YAMLObject
         :param data:
         :return:
         """
-        new_data = data.__to_yaml_dict__()
+        data_type = type(data)
+        if data_type.__to_yaml_dict__ is _DEFAULT_TO_YAML_DICT and not _has_legacy_method(data_type, 'to_yaml_dict'):
+            # fast path: `__to_yaml_dict__` is not overridden, pass vars(data) (and the slots if any) directly
+            new_data = _vars_and_slots(data)
+        else:
+            new_data = data.__to_yaml_dict__()
         return dumper.represent_mapping(cls.yaml_tag, new_data, flow_style=cls.yaml_flow_style)
 
     @classmethod